@@ -1,6 +1,13 @@
 """Git utilities wrapping GitPython for repository operations."""
 
 import os
+import re
+import sqlite3
+import subprocess
+import sys
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -17,17 +24,212 @@ from .models import (
 )
 
 
+# Generated files (lockfiles, minified bundles, vendored code) whose patch
+# content carries no useful signal; statuses and counts are still reported.
+_GENERATED_RE = re.compile(
+    r"(^|/)(package-lock\.json|yarn\.lock|pnpm-lock\.yaml|poetry\.lock|uv\.lock|Cargo\.lock)$"
+    r"|\.min\.(js|css)$"
+    r"|(^|/)(dist|vendor|node_modules)/"
+)
+
+_STATUS_NAMES = {
+    "A": "added",
+    "C": "added",
+    "D": "deleted",
+    "M": "modified",
+    "R": "renamed",
+}
+
+
+def _parse_numstat_z(output: str) -> tuple[dict[str, tuple[int, int]], set[str]]:
+    """Parse `git diff --numstat -z` output.
+
+    Each record is `adds\\tdels\\tpath NUL`; for renames the path field is
+    empty and the old/new paths follow as two separate NUL-terminated fields.
+    Binary files report `-` for both counts; they are counted as 0/0 and
+    collected into the returned set.
+
+    Returns:
+        ({path: (additions, deletions)}, {binary paths})
+    """
+    counts: dict[str, tuple[int, int]] = {}
+    binaries: set[str] = set()
+    tokens = output.split("\x00")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if not token:
+            i += 1
+            continue
+        adds, dels, path = token.split("\t", 2)
+        if path:
+            i += 1
+        else:
+            # Rename record: old path, then new path
+            path = tokens[i + 2]
+            i += 3
+        if adds == "-":
+            binaries.add(path)
+            counts[path] = (0, 0)
+        else:
+            counts[path] = (int(adds), int(dels))
+    return counts, binaries
+
+
+def _parse_name_status_z(output: str) -> list[tuple[str, str]]:
+    """Parse `git diff --name-status -z` output into [(status, path), ...].
+
+    Rename/copy records carry two path fields; the new path is reported.
+    """
+    entries: list[tuple[str, str]] = []
+    tokens = output.split("\x00")
+    i = 0
+    while i < len(tokens):
+        code = tokens[i]
+        if not code:
+            i += 1
+            continue
+        if code[0] in ("R", "C"):
+            path = tokens[i + 2]
+            i += 3
+        else:
+            path = tokens[i + 1]
+            i += 2
+        entries.append((_STATUS_NAMES.get(code[0], "modified"), path))
+    return entries
+
+
+def _parse_porcelain_v2_z(
+    output: bytes,
+) -> tuple[str | None, list[str], list[str], list[str]]:
+    """Parse `git status --porcelain=v2 --branch -z` output.
+
+    Returns (branch, staged, modified, untracked). The XY field of tracked
+    entries tells staged (X) from worktree (Y) changes; rename records carry
+    the original path as a trailing NUL field, which is skipped.
+    """
+    branch: str | None = None
+    staged: list[str] = []
+    modified: list[str] = []
+    untracked: list[str] = []
+
+    tokens = output.split(b"\x00")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if not token:
+            continue
+        kind = token[:1]
+        if kind == b"#":
+            if token.startswith(b"# branch.head "):
+                branch = token[14:].decode("utf-8", errors="replace")
+        elif kind in (b"1", b"2"):
+            # '2' (rename/copy) records have an extra score field and are
+            # followed by the original path as a separate NUL field
+            fields = token.split(b" ", 8 if kind == b"1" else 9)
+            xy = fields[1]
+            path = fields[-1].decode("utf-8", errors="replace")
+            if kind == b"2":
+                i += 1
+            if xy[0:1] != b".":
+                staged.append(path)
+            if xy[1:2] != b".":
+                modified.append(path)
+        elif kind == b"u":
+            # Unmerged entry; surface it as a worktree modification
+            fields = token.split(b" ", 10)
+            modified.append(fields[-1].decode("utf-8", errors="replace"))
+        elif kind == b"?":
+            untracked.append(token[2:].decode("utf-8", errors="replace"))
+
+    return branch, staged, modified, untracked
+
+
 class GitManager:
     """Manages git operations for a repository with lazy initialization."""
 
+    # Bounded cache for compare_commits results; diffs between two commits
+    # are immutable, so entries never go stale.
+    _DIFF_CACHE_SIZE = 64
+
     def __init__(self, repo_path: str | Path):
         """Initialize the git manager.
-        
+
         Args:
             repo_path: Path to the repository directory
         """
         self.repo_path = Path(repo_path).resolve()
         self._repo: Repo | None = None
+        self._init_checked: bool | None = None
+        self._diff_cache: OrderedDict[tuple, CommitDiff] = OrderedDict()
+        self._commits_db: sqlite3.Connection | None = None
+        self._commits_db_failed = False
+        self._catfile_proc: subprocess.Popen | None = None
+
+    def _git(self, *args: str) -> bytes:
+        """Run a git command directly and return its stdout as bytes.
+
+        Bypasses GitPython's command wrapper (AutoInterrupt, per-call
+        working-directory handling, output buffering), whose overhead is
+        comparable to git itself for sub-second read-only commands.
+        """
+        result = subprocess.run(
+            ["git", "-C", str(self.repo_path), *args],
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", errors="replace").strip()
+            raise ValueError(f"git {args[0]} failed: {stderr}")
+        return result.stdout
+
+    def _catfile(self) -> subprocess.Popen:
+        """Get (or start) the persistent cat-file process for SHA lookups.
+
+        Forking git per lookup costs milliseconds; a single long-lived
+        `git cat-file --batch-check` answers ref-to-SHA queries over a pipe
+        in microseconds. Restarted automatically if the child has exited.
+        """
+        proc = self._catfile_proc
+        if proc is None or proc.poll() is not None:
+            proc = subprocess.Popen(
+                [
+                    "git",
+                    "-C",
+                    str(self.repo_path),
+                    "cat-file",
+                    "--batch-check=%(objectname) %(objecttype)",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            weakref.finalize(self, proc.kill)
+            self._catfile_proc = proc
+        return proc
+
+    def _resolve_commit(self, ref: str) -> str:
+        """Resolve a ref to its full commit SHA, raising ValueError if unknown."""
+        if not ref or any(c.isspace() for c in ref):
+            raise ValueError(f"Invalid commit SHA: '{ref}'")
+
+        try:
+            proc = self._catfile()
+            proc.stdin.write(f"{ref}^{{commit}}\n".encode())
+            proc.stdin.flush()
+            line = proc.stdout.readline().decode("utf-8", errors="replace").strip()
+        except OSError:
+            # The child died mid-query; drop it and fall back to GitPython
+            self._catfile_proc = None
+            try:
+                return self.repo.commit(ref).hexsha
+            except BadName as e:
+                raise ValueError(f"Invalid commit SHA: {e}")
+
+        sha, _, objtype = line.partition(" ")
+        if objtype != "commit":
+            raise ValueError(f"Invalid commit SHA: '{ref}'")
+        return sha
 
     @property
     def repo(self) -> Repo:
@@ -40,15 +242,33 @@ class GitManager:
                     f"Git repository not initialized at {self.repo_path}. "
                     "Call initialize_repo first."
                 )
+            # Release the Repo's cached resources once this manager is
+            # garbage collected (e.g. evicted from the tools-level cache);
+            # GitPython is prone to leaking them in long-running processes.
+            weakref.finalize(self, self._repo.close)
         return self._repo
 
     def is_initialized(self) -> bool:
-        """Check if git repository is initialized."""
-        try:
-            Repo(self.repo_path)
-            return True
-        except InvalidGitRepositoryError:
-            return False
+        """Check if git repository is initialized.
+
+        The answer is cached on the instance: constructing a throwaway Repo
+        just to probe stats .git, reads HEAD, and parses config on every
+        call. A cheap .git existence check short-circuits the common
+        uninitialized case; initialize() invalidates the cache.
+        """
+        if self._init_checked is None:
+            if self._repo is not None:
+                self._init_checked = True
+            elif not (self.repo_path / ".git").exists():
+                self._init_checked = False
+            else:
+                try:
+                    self._repo = Repo(self.repo_path)
+                    weakref.finalize(self, self._repo.close)
+                    self._init_checked = True
+                except InvalidGitRepositoryError:
+                    self._init_checked = False
+        return self._init_checked
 
     def initialize(self, initial_commit: bool = True) -> str:
         """Initialize git repository if not already initialized.
@@ -66,7 +286,9 @@ class GitManager:
             return f"Repository already initialized at {self.repo_path}"
 
         self._repo = Repo.init(self.repo_path)
-        
+        self._init_checked = True
+        weakref.finalize(self, self._repo.close)
+
         if initial_commit:
             # Create a README if the repo is empty
             readme_path = self.repo_path / "README.md"
@@ -103,26 +325,21 @@ class GitManager:
                 has_changes=False,
             )
 
-        repo = self.repo
-        
-        # Get current branch
-        try:
-            current_branch = repo.active_branch.name
-        except TypeError:
-            current_branch = "HEAD (detached)"
+        # One git status fork returns the branch plus staged, modified and
+        # untracked files in a single pass over index and working tree.
+        output = self._git("status", "--porcelain=v2", "--branch", "-z")
+        branch, staged, modified, untracked = _parse_porcelain_v2_z(output)
 
-        # Get file statuses
-        staged = [item.a_path for item in repo.index.diff("HEAD")]
-        modified = [item.a_path for item in repo.index.diff(None)]
-        untracked = repo.untracked_files
+        if branch == "(detached)":
+            branch = "HEAD (detached)"
 
         return RepoStatus(
             is_initialized=True,
-            current_branch=current_branch,
+            current_branch=branch,
             has_changes=bool(staged or modified or untracked),
             staged_files=staged,
             modified_files=modified,
-            untracked_files=list(untracked),
+            untracked_files=untracked,
         )
 
     def commit_all(self, message: str) -> str:
@@ -136,45 +353,147 @@ class GitManager:
         """
         repo = self.repo
 
-        # Stage all changes
-        repo.git.add(A=True)
-
-        # Check if there are changes to commit
-        if not repo.index.diff("HEAD") and not repo.untracked_files:
+        # One pass over the working tree to detect a no-op commit instead of
+        # forking git add and then re-reading the index.
+        if not repo.is_dirty(untracked_files=True):
             return "No changes to commit"
 
+        # Stage through the cached index rather than a git add -A subprocess.
+        # Deletions go first (they rewrite the on-disk index), then new and
+        # modified files are added in one batch.
+        modified = []
+        deleted = []
+        for item in repo.index.diff(None):
+            (deleted if item.deleted_file else modified).append(item.a_path)
+
+        if deleted:
+            repo.index.remove(deleted, working_tree=False)
+
+        to_add = repo.untracked_files + modified
+        if to_add:
+            repo.index.add(to_add, write=True)
+
         # Commit
         commit = repo.index.commit(message)
         return commit.hexsha
 
+    def _commit_cache(self) -> sqlite3.Connection | None:
+        """Lazily open the on-disk commit cache, or None if unavailable.
+
+        Commit metadata is immutable by SHA, so a small sqlite database in
+        the git directory persists it across tool calls and server restarts.
+        Failures (e.g. a read-only .git) disable the cache rather than the
+        operation.
+        """
+        if self._commits_db is None and not self._commits_db_failed:
+            try:
+                db = sqlite3.connect(str(Path(self.repo.git_dir) / "mcp-commits.db"))
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS commits ("
+                    "sha TEXT PRIMARY KEY, author TEXT, email TEXT, ts INT, msg TEXT)"
+                )
+                db.commit()
+                weakref.finalize(self, db.close)
+                self._commits_db = db
+            except sqlite3.Error:
+                self._commits_db_failed = True
+        return self._commits_db
+
+    def _cached_commit_rows(self, shas: list[str]) -> dict[str, tuple]:
+        """Load cached (author, email, ts, msg) rows for the given SHAs."""
+        rows: dict[str, tuple] = {}
+        db = self._commit_cache()
+        if db is None:
+            return rows
+        try:
+            # Chunk to stay under sqlite's bound-parameter limit
+            for start in range(0, len(shas), 500):
+                chunk = shas[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = db.execute(
+                    f"SELECT sha, author, email, ts, msg FROM commits "
+                    f"WHERE sha IN ({placeholders})",
+                    chunk,
+                )
+                for sha, author, email, ts, msg in cursor:
+                    rows[sha] = (author, email, ts, msg)
+        except sqlite3.Error:
+            return {}
+        return rows
+
+    def _store_commit_rows(self, rows: dict[str, tuple]) -> None:
+        """Persist freshly fetched commit rows; best-effort."""
+        db = self._commit_cache()
+        if db is None or not rows:
+            return
+        try:
+            db.executemany(
+                "INSERT OR REPLACE INTO commits (sha, author, email, ts, msg) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(sha, *row) for sha, row in rows.items()],
+            )
+            db.commit()
+        except sqlite3.Error:
+            pass
+
+    def _fetch_commit_rows(self, shas: list[str]) -> dict[str, tuple]:
+        """Fetch (author, email, ts, msg) for SHAs with one git log call."""
+        rows: dict[str, tuple] = {}
+        output = self._git(
+            "log",
+            "--no-walk=unsorted",
+            "--pretty=format:%H%x1f%an%x1f%ae%x1f%ct%x1f%s%x1e",
+            *shas,
+        ).decode("utf-8", errors="replace")
+        for record in output.split("\x1e"):
+            record = record.strip("\n")
+            if not record:
+                continue
+            sha, author, email, committed_ts, subject = record.split("\x1f")
+            rows[sha] = (author, email, int(committed_ts), subject)
+        return rows
+
     def list_commits(self, branch: str = "HEAD", limit: int = 50) -> CommitList:
         """List commits on a branch.
-        
+
         Args:
             branch: Branch name or HEAD
             limit: Maximum number of commits to return
-            
+
         Returns:
             CommitList with commit information
         """
         repo = self.repo
-        
+
+        # Resolve the SHAs cheaply first, then serve metadata from the
+        # on-disk cache and fetch only the missing commits in one batch.
         try:
-            commits = list(repo.iter_commits(branch, max_count=limit))
-        except BadName:
+            shas = self._git("rev-list", f"-n{limit}", branch).decode().split()
+        except ValueError:
             raise ValueError(f"Branch or ref '{branch}' not found")
 
+        rows = self._cached_commit_rows(shas)
+        missing = [sha for sha in shas if sha not in rows]
+        if missing:
+            fetched = self._fetch_commit_rows(missing)
+            self._store_commit_rows(fetched)
+            rows.update(fetched)
+
         commit_infos = []
-        for commit in commits:
+        for sha in shas:
+            author, email, committed_ts, subject = rows[sha]
             commit_infos.append(
                 CommitInfo(
-                    sha=commit.hexsha,
-                    short_sha=commit.hexsha[:7],
-                    message=commit.message.strip(),
-                    author=commit.author.name,
-                    author_email=commit.author.email,
+                    sha=sha,
+                    short_sha=sha[:7],
+                    message=subject,
+                    # The same handful of authors repeats across a listing;
+                    # interning collapses the copies into shared strings.
+                    author=sys.intern(author),
+                    author_email=sys.intern(email),
                     timestamp=datetime.fromtimestamp(
-                        commit.committed_date, tz=timezone.utc
+                        int(committed_ts), tz=timezone.utc
                     ),
                 )
             )
@@ -191,7 +510,7 @@ class GitManager:
         return CommitList(
             commits=commit_infos,
             total_count=len(commit_infos),
-            branch=branch_name,
+            branch=sys.intern(branch_name),
         )
 
     def rollback(self, commit_sha: str, mode: str = "soft") -> str:
@@ -210,88 +529,154 @@ class GitManager:
         if mode not in valid_modes:
             raise ValueError(f"Mode must be one of: {valid_modes}")
 
+        # Validate the target without forking a fresh git process
+        target = self._resolve_commit(commit_sha)
+
         try:
-            repo.git.reset(f"--{mode}", commit_sha)
+            repo.git.reset(f"--{mode}", target)
         except GitCommandError as e:
             raise ValueError(f"Failed to reset to {commit_sha}: {e}")
 
         return repo.head.commit.hexsha
 
-    def compare_commits(self, from_sha: str, to_sha: str) -> CommitDiff:
+    def compare_commits(
+        self,
+        from_sha: str,
+        to_sha: str,
+        include_patch: bool = False,
+        detect_renames: bool = False,
+        parallel: bool = True,
+    ) -> CommitDiff:
         """Compare two commits and show differences.
-        
+
         Args:
             from_sha: Source commit SHA
             to_sha: Target commit SHA
-            
+            include_patch: Whether to include per-file patch text. Off by
+                default; fetch individual patches on demand with
+                get_file_patch. Counting additions/deletions never
+                requires patches.
+            detect_renames: Whether to run git's similarity-based rename
+                detection. Off by default; renames then show as delete+add.
+            parallel: Whether to generate per-file patches on a thread pool
+                when include_patch is set. The git subprocess calls release
+                the GIL, so this scales with core count.
+
         Returns:
             CommitDiff with file changes
         """
-        repo = self.repo
+        self.repo  # Raise the friendly error if the repo is not initialized
+
+        from_hex = self._resolve_commit(from_sha)
+        to_hex = self._resolve_commit(to_sha)
+
+        # Key on resolved full SHAs so short and full forms share an entry
+        cache_key = (from_hex, to_hex, include_patch, detect_renames)
+        cached = self._diff_cache.get(cache_key)
+        if cached is not None:
+            self._diff_cache.move_to_end(cache_key)
+            return cached
+
+        # Rename detection runs similarity scoring over all adds/deletes;
+        # skip it unless the caller explicitly asked for it.
+        rename_flag = "-M" if detect_renames else "--no-renames"
+
+        # Counts and statuses come from two small tabular git invocations
+        # instead of scanning every patch line in Python.
+        counts, binaries = _parse_numstat_z(
+            self._git(
+                "diff", "--numstat", "-z", rename_flag, from_hex, to_hex
+            ).decode("utf-8", errors="replace")
+        )
+        statuses = _parse_name_status_z(
+            self._git(
+                "diff", "--name-status", "-z", rename_flag, from_hex, to_hex
+            ).decode("utf-8", errors="replace")
+        )
 
-        try:
-            from_commit = repo.commit(from_sha)
-            to_commit = repo.commit(to_sha)
-        except BadName as e:
-            raise ValueError(f"Invalid commit SHA: {e}")
+        # Full patch text is only generated when requested. With rename
+        # detection off, each file's patch is independent, so fan the
+        # per-file git diff calls out over a thread pool.
+        patches: dict[str, str | None] = {}
+        if include_patch:
+            # Binary and generated files keep their status/counts but never
+            # get patch text; it carries no reviewable content.
+            paths = [
+                path
+                for _, path in statuses
+                if path not in binaries and not _GENERATED_RE.search(path)
+            ]
+
+            def _file_patch(path: str) -> str | None:
+                patch = self._git(
+                    "diff", rename_flag, from_hex, to_hex, "--", path
+                ).decode("utf-8", errors="replace")
+                return patch or None
+
+            if parallel and len(paths) > 1:
+                workers = min(8, os.cpu_count() or 1, len(paths))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    patches = dict(zip(paths, pool.map(_file_patch, paths)))
+            else:
+                patches = {path: _file_patch(path) for path in paths}
 
-        diffs = from_commit.diff(to_commit)
-        
         files = []
         total_add = 0
         total_del = 0
 
-        for diff in diffs:
-            # Determine status
-            if diff.new_file:
-                status = "added"
-            elif diff.deleted_file:
-                status = "deleted"
-            elif diff.renamed:
-                status = "renamed"
-            else:
-                status = "modified"
-
-            # Get patch content
-            try:
-                patch = diff.diff.decode("utf-8", errors="replace") if diff.diff else None
-            except Exception:
-                patch = None
-
-            # Count additions/deletions from patch
-            additions = 0
-            deletions = 0
-            if patch:
-                for line in patch.split("\n"):
-                    if line.startswith("+") and not line.startswith("+++"):
-                        additions += 1
-                    elif line.startswith("-") and not line.startswith("---"):
-                        deletions += 1
-
+        for status, path in statuses:
+            additions, deletions = counts.get(path, (0, 0))
             total_add += additions
             total_del += deletions
 
             files.append(
                 FileChange(
-                    filename=diff.b_path or diff.a_path,
+                    filename=path,
                     status=status,
                     additions=additions,
                     deletions=deletions,
-                    patch=patch,
+                    patch=patches.get(path),
+                    binary=path in binaries,
                 )
             )
 
         summary = f"{len(files)} files changed, {total_add} insertions(+), {total_del} deletions(-)"
 
-        return CommitDiff(
-            from_commit=from_sha,
-            to_commit=to_sha,
+        result = CommitDiff(
+            from_commit=from_hex,
+            to_commit=to_hex,
             files=files,
             total_additions=total_add,
             total_deletions=total_del,
             summary=summary,
         )
 
+        self._diff_cache[cache_key] = result
+        if len(self._diff_cache) > self._DIFF_CACHE_SIZE:
+            self._diff_cache.popitem(last=False)
+
+        return result
+
+    def get_file_patch(self, from_sha: str, to_sha: str, filename: str) -> str:
+        """Get the unified diff for a single file between two commits.
+
+        Args:
+            from_sha: Source commit SHA
+            to_sha: Target commit SHA
+            filename: Path of the file to diff
+
+        Returns:
+            Unified diff text (empty if the file is unchanged)
+        """
+        self.repo  # Raise the friendly error if the repo is not initialized
+
+        from_hex = self._resolve_commit(from_sha)
+        to_hex = self._resolve_commit(to_sha)
+
+        return self._git(
+            "diff", from_hex, to_hex, "--", filename
+        ).decode("utf-8", errors="replace")
+
     def create_branch(self, branch_name: str, from_ref: str | None = None) -> str:
         """Create a new branch.
         
@@ -306,8 +691,8 @@ class GitManager:
 
         if from_ref:
             try:
-                start_point = repo.commit(from_ref)
-            except BadName:
+                start_point = self._resolve_commit(from_ref)
+            except ValueError:
                 raise ValueError(f"Invalid ref '{from_ref}'")
             repo.create_head(branch_name, start_point)
         else:
@@ -341,20 +726,31 @@ class GitManager:
             List of branch information
         """
         repo = self.repo
-        
+
         try:
             current = repo.active_branch.name
         except TypeError:
             current = None
 
+        # One for-each-ref call instead of inflating a commit object per
+        # branch to read its SHA and subject.
+        output = self._git(
+            "for-each-ref",
+            "--format=%(refname:short)%1f%(objectname:short=7)%1f%(subject)",
+            "refs/heads/",
+        ).decode("utf-8", errors="replace")
+
         branches = []
-        for branch in repo.heads:
+        for line in output.splitlines():
+            if not line:
+                continue
+            name, short_sha, subject = line.split("\x1f")
             branches.append(
                 BranchInfo(
-                    name=branch.name,
-                    is_current=branch.name == current,
-                    last_commit_sha=branch.commit.hexsha[:7],
-                    last_commit_message=branch.commit.message.strip().split("\n")[0],
+                    name=name,
+                    is_current=name == current,
+                    last_commit_sha=short_sha,
+                    last_commit_message=subject,
                 )
             )
 
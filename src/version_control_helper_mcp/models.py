@@ -30,7 +30,15 @@ class FileChange(BaseModel):
     status: str = Field(description="Change status: added, modified, deleted, renamed")
     additions: int = Field(description="Number of lines added")
     deletions: int = Field(description="Number of lines deleted")
-    patch: str | None = Field(default=None, description="Unified diff patch content")
+    patch: str | None = Field(
+        default=None,
+        description="Unified diff patch content; populated only when explicitly requested",
+    )
+    patch_resource_uri: str | None = Field(
+        default=None,
+        description="MCP resource URI to fetch this file's patch without embedding it in JSON",
+    )
+    binary: bool = Field(default=False, description="Whether git detected the file as binary")
 
 
 class CommitDiff(BaseModel):
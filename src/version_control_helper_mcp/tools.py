@@ -1,27 +1,54 @@
 """MCP tool implementations for version control operations."""
 
+import os
+import re
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import quote, unquote
 from mcp.server.fastmcp import FastMCP
 from mcp.types import Tool, TextContent
 
-from .git_utils import GitManager
+from .git_utils import GitManager, _GENERATED_RE
 from .models import CommitList, CommitDiff, BranchInfo, RepoStatus
 
 
+# Pretty-printed JSON roughly doubles the payload and runs pydantic's
+# Python-level indenter; keep tool output compact unless MCP_PRETTY is set
+# for debugging.
+_JSON_INDENT = 2 if os.environ.get("MCP_PRETTY") else None
+
+# Pre-compiled path classifiers for generate_commit_message, replacing
+# repeated substring scans over every changed path.
+_TEST_RE = re.compile(r"(?i)(^|/)tests?(/|$)|(^|/)test_[^/]*\.py$|_test\.py$")
+_DOC_RE = re.compile(r"(?i)readme|(^|/)docs?(/|$)|\.md$")
+
+
+@lru_cache(maxsize=32)
+def _get_manager(path: str) -> GitManager:
+    """Get (or create) the cached GitManager for a resolved repo path.
+
+    Constructing a GitManager per tool call re-opens the .git directory and
+    re-reads refs on every request; caching by path amortizes that fixed cost
+    across the server's lifetime. The manager closes its underlying Repo when
+    it is evicted from the cache and garbage collected.
+    """
+    return GitManager(path)
+
+
 def register_tools(mcp: FastMCP, default_repo_path: str | None = None):
     """Register all MCP tools on the server.
-    
+
     Args:
         mcp: MCP server instance
         default_repo_path: Default repository path (can be overridden per-call)
     """
-    
+
     def get_manager(repo_path: str | None = None) -> GitManager:
         """Get GitManager for the specified or default repo path."""
         path = repo_path or default_repo_path
         if not path:
             raise ValueError("repo_path is required (no default configured)")
-        return GitManager(path)
+        return _get_manager(str(Path(path).resolve()))
 
     @mcp.tool()
     async def initialize_repo(
@@ -44,7 +71,7 @@ def register_tools(mcp: FastMCP, default_repo_path: str | None = None):
             A status message indicating whether the repository was initialized, 
             already existed, or if an initial commit was created.
         """
-        manager = GitManager(repo_path)
+        manager = get_manager(repo_path)
         return manager.initialize(initial_commit=initial_commit)
 
     @mcp.tool()
@@ -76,9 +103,9 @@ def register_tools(mcp: FastMCP, default_repo_path: str | None = None):
               "untracked_files": ["new_file.py"]
             }
         """
-        manager = GitManager(repo_path)
+        manager = get_manager(repo_path)
         status = manager.get_status()
-        return status.model_dump_json(indent=2)
+        return status.model_dump_json(indent=_JSON_INDENT)
 
     @mcp.tool()
     async def commit_all_changes(
@@ -102,8 +129,8 @@ def register_tools(mcp: FastMCP, default_repo_path: str | None = None):
             The SHA (full hash) of the new commit, or a message indicating "No changes to commit" 
             if the working directory was clean.
         """
-        manager = GitManager(repo_path)
-        
+        manager = get_manager(repo_path)
+
         # Lazy initialization for mutating operations
         if not manager.is_initialized():
             manager.initialize(initial_commit=False)
@@ -136,7 +163,7 @@ def register_tools(mcp: FastMCP, default_repo_path: str | None = None):
         """
         manager = get_manager(repo_path)
         commits = manager.list_commits(branch=branch, limit=limit)
-        return commits.model_dump_json(indent=2)
+        return commits.model_dump_json(indent=_JSON_INDENT)
 
     @mcp.tool()
     async def rollback_to_commit(
@@ -176,30 +203,104 @@ def register_tools(mcp: FastMCP, default_repo_path: str | None = None):
         repo_path: str,
         from_commit: str,
         to_commit: str,
+        include_patch: bool = False,
+        detect_renames: bool = False,
     ) -> str:
-        """Compare two commits and return the diff.
-        
-        This tool generates a detailed comparison between two points in the history (`from_commit` -> `to_commit`).
+        """Compare two commits and return the list of changed files.
+
+        This tool generates a comparison between two points in the history (`from_commit` -> `to_commit`).
         It's useful for:
         - Reviewing changes between versions.
         - Debugging when a bug was introduced.
         - Generating a changelog.
-        
+
         The output includes a summary of file changes (added, modified, deleted, renamed)
-        and the actual diff content for each file.
-        
+        with addition/deletion counts. Diff content is NOT included by default; each
+        file instead carries a `patch_resource_uri` — read that resource (or call
+        `get_file_patch`) to fetch the patch for the specific files you need.
+
         Args:
             repo_path: The absolute path to the repository.
             from_commit: The source (older) commit SHA.
             to_commit: The target (newer) commit SHA.
-            
+            include_patch: If True, embed the full diff content for every file in the
+                           response. Expensive on large diffs; prefer the default
+                           (False) plus targeted `get_file_patch` calls.
+            detect_renames: If True, run git's rename detection so moved files show
+                            as "renamed" instead of a delete plus an add. Off by
+                            default because similarity scoring is expensive.
+
         Returns:
-            A JSON-formatted string containing the list of changed files, 
+            A JSON-formatted string containing the list of changed files,
             additions/deletions counts, and diff patches.
         """
         manager = get_manager(repo_path)
-        diff = manager.compare_commits(from_sha=from_commit, to_sha=to_commit)
-        return diff.model_dump_json(indent=2)
+        diff = manager.compare_commits(
+            from_sha=from_commit,
+            to_sha=to_commit,
+            include_patch=include_patch,
+            detect_renames=detect_renames,
+        )
+        if not include_patch:
+            # Point at the patch resources instead of embedding patch text;
+            # fetched patches skip the JSON string-escape round-trip. URIs
+            # are built from the resolved full SHAs: hex is URI-safe (refs
+            # like "feature/x" would break the template), and it pins the
+            # patch to the diff reported here even if the ref moves later.
+            repo_part = quote(str(manager.repo_path), safe="")
+            for file in diff.files:
+                # No patch resource for binary or generated files; their
+                # content is not worth pulling into the context window.
+                if file.binary or _GENERATED_RE.search(file.filename):
+                    continue
+                file.patch_resource_uri = (
+                    f"diff://{repo_part}/{diff.from_commit}/{diff.to_commit}/"
+                    f"{quote(file.filename, safe='')}"
+                )
+        return diff.model_dump_json(indent=_JSON_INDENT)
+
+    @mcp.tool()
+    async def get_file_patch(
+        repo_path: str,
+        from_commit: str,
+        to_commit: str,
+        filename: str,
+    ) -> str:
+        """Get the diff content for a single file between two commits.
+
+        Companion to `compare_commits`: first list the changed files with
+        `compare_commits`, then fetch the patches you actually want to read
+        with this tool. This keeps large diffs out of the context window.
+
+        Args:
+            repo_path: The absolute path to the repository.
+            from_commit: The source (older) commit SHA.
+            to_commit: The target (newer) commit SHA.
+            filename: The path of the file (as reported by `compare_commits`).
+
+        Returns:
+            The unified diff text for that file, or a note if it is unchanged.
+        """
+        manager = get_manager(repo_path)
+        patch = manager.get_file_patch(
+            from_sha=from_commit, to_sha=to_commit, filename=filename
+        )
+        if not patch:
+            return f"No differences for {filename} between {from_commit[:7]} and {to_commit[:7]}"
+        return patch
+
+    @mcp.resource("diff://{repo}/{from_sha}/{to_sha}/{filename}")
+    def file_patch_resource(repo: str, from_sha: str, to_sha: str, filename: str) -> str:
+        """Unified diff for one file between two commits.
+
+        Backs the patch_resource_uri entries emitted by compare_commits; the
+        repo path and filename are percent-encoded in the URI so they fit in
+        single template fields.
+        """
+        manager = get_manager(unquote(repo))
+        return manager.get_file_patch(
+            from_sha=from_sha, to_sha=to_sha, filename=unquote(filename)
+        )
 
     @mcp.tool()
     async def create_branch(
@@ -312,13 +413,19 @@ def register_tools(mcp: FastMCP, default_repo_path: str | None = None):
         if style == "conventional":
             if status.untracked_files:
                 prefix = "feat"
-            elif any("test" in f.lower() for f in status.modified_files + status.staged_files):
-                prefix = "test"
-            elif any("readme" in f.lower() or "doc" in f.lower() for f in status.modified_files + status.staged_files):
-                prefix = "docs"
             else:
-                prefix = "chore"
-            
+                # Single pass over the tracked paths; a test match wins and
+                # ends the scan early.
+                has_test = has_doc = False
+                for f in status.staged_files + status.modified_files:
+                    if _GENERATED_RE.search(f):
+                        continue
+                    has_test = has_test or _TEST_RE.search(f) is not None
+                    has_doc = has_doc or _DOC_RE.search(f) is not None
+                    if has_test:
+                        break
+                prefix = "test" if has_test else "docs" if has_doc else "chore"
+
             message = f"{prefix}: update {file_count} file(s)"
         else:
             message = f"Update {file_count} file(s)"